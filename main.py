@@ -3,10 +3,25 @@
 
 import os
 import argparse
+import hashlib
+import math
 import re
+try:
+    # google-re2 matches in linear time whatever the input; the standard library is used when it isn't installed
+    import re2
+except ImportError:
+    re2 = None
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
+from urllib.parse import unquote
+import httpx
+import orjson
 from notion_client import Client
-from notion_client.errors import APIResponseError
+from notion_client.errors import NotionClientErrorBase, RequestTimeoutError
 
 # --- Configuration ---
 # Change these strings to match the property names in your Notion database.
@@ -18,6 +33,16 @@ TAGS_PROP = "Tags"         # A 'Multi-select' property for tags
 FINISH_BEFORE_PROP = "Finish Before" # The name of your custom date property
 SUB_ITEM_PROP = "Sub-item"  # The name of your relation property for sub-items
 PARENT_ITEM_PROP = "Parent item" # The name of your relation property for parent item
+SOURCE_ID_PROP = "SourceId"  # A 'Text' property recording the page each To-Do was created from
+
+# Maximum number of Notion API requests in flight at the same time
+MAX_WORKERS = 8
+# Notion allows an average of three requests per second per integration
+REQUESTS_PER_SECOND = 3
+# How often a rate limited request, or one that hit a gateway error or timed out, is retried before giving up
+MAX_RETRIES = 3
+# Records, per database, the last date a --since run finished, so the next run starts after it
+STATE_FILE = os.path.join(os.path.expanduser("~"), ".notion_todo_state.json")
 
 # --- Environment Variable Setup ---
 NOTION_TOKEN = os.environ.get("NOTION_TOKEN")
@@ -28,16 +53,168 @@ if not NOTION_TOKEN or not NOTION_DATABASE_ID:
         "Error: Please set NOTION_TOKEN and NOTION_DATABASE_ID environment variables."
     )
 
-# Initialize the Notion Client
+class RateLimiter:
+    """Token bucket that blocks the calling thread until a request may be sent."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, request=None):
+        """Takes one token, waiting for the bucket to refill if it is empty. Usable as an httpx request hook."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class OrjsonHTTPClient(httpx.Client):
+    """httpx client that encodes JSON request bodies with orjson instead of the json module."""
+
+    def build_request(self, method, url, *, json=None, content=None, headers=None, **kwargs):
+        if json is not None:
+            content = orjson.dumps(json)
+            headers = httpx.Headers(headers)
+            headers["Content-Type"] = "application/json"
+        return super().build_request(method, url, content=content, headers=headers, **kwargs)
+
+# What a failed Notion request raises: an error response (JSON or not), a timeout, or a lost connection
+NOTION_ERRORS = (NotionClientErrorBase, httpx.TransportError)
+
+class NotionClient(Client):
+    """
+    Notion client that decodes responses with orjson, which is several times faster than the json module,
+    and retries requests that Notion rejected because of its rate limit, or that failed on the way.
+    """
+
+    def request(self, path, method, *args, **kwargs):
+        for attempt in range(MAX_RETRIES):
+            try:
+                return super().request(path, method, *args, **kwargs)
+            except NOTION_ERRORS as e:
+                if not self.can_retry(e, path, method):
+                    raise
+                time.sleep(self.retry_delay(e, attempt))
+        return super().request(path, method, *args, **kwargs)
+
+    @staticmethod
+    def can_retry(error: Exception, path: str, method: str) -> bool:
+        """
+        Rate limited requests were not carried out, so they can always be repeated.
+        After a gateway error, a timeout or a lost connection the request may or may not
+        have been carried out, so only requests that are safe to send twice are retried.
+        """
+        if getattr(error, "code", None) == "rate_limited":
+            return True
+        # Queries are POSTs that only read, creating a page twice would duplicate it
+        if not (method.upper() in ("GET", "PATCH", "DELETE") or path.endswith("/query")):
+            return False
+        if isinstance(error, (RequestTimeoutError, httpx.TransportError)):
+            return True
+        return getattr(error, "status", None) in (502, 503, 504)
+
+    @staticmethod
+    def retry_delay(error: Exception, attempt: int) -> float:
+        """Waits as long as Notion asks in Retry-After, otherwise backs off exponentially: 1, 2, 4... seconds."""
+        try:
+            return float(getattr(error, "headers", {}).get("Retry-After"))
+        except (TypeError, ValueError):
+            return 2 ** attempt
+
+    def _parse_response(self, response: httpx.Response):
+        if response.is_success:
+            return orjson.loads(response.content)
+        # Let notion_client turn error responses into its exception types
+        return super()._parse_response(response)
+
+# Initialize the Notion Client. Every request it sends, from any thread, goes through the rate limiter.
+# HTTP/2 lets the worker threads share one TLS connection instead of each opening their own.
+rate_limiter = RateLimiter(REQUESTS_PER_SECOND)
 try:
-    client = Client(auth=NOTION_TOKEN)
+    http_client = OrjsonHTTPClient(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+        event_hooks={"request": [rate_limiter.acquire]},
+    )
+    # notion-client's own retries are turned off: NotionClient.request does the retrying, and
+    # also covers gateway errors on queries and updates, which the built-in retry leaves alone
+    client = NotionClient(auth=NOTION_TOKEN, client=http_client, timeout_ms=30_000, retry=False)
+    # The client replaces the httpx timeout with a single timeout_ms value, so set a shorter
+    # connect timeout afterwards: an unreachable host fails fast instead of after 30 seconds
+    http_client.timeout = httpx.Timeout(30.0, connect=5.0)
 except Exception as e:
     raise SystemExit(f"Error initializing Notion client: {e}")
 
-# Regex to find "TODO" and its synonyms at the beginning of a line (after spaces/punctuation), case-insensitive
-TODO_DETECT = re.compile(r"^[\s\W]*(todo|to-?do|to\s+do)\b", re.IGNORECASE)
-# Regex to remove "TODO" keyword and following colons/spaces ONLY from the beginning of a line
-TODO_REMOVE = re.compile(r"^[\s\W]*(todo|to-?do|to\s+do)[\s:]*", re.IGNORECASE)
+# Regex to find "TODO" and its synonyms at the beginning of a line (after spaces/punctuation, including a
+# "[ ]" checkbox), case-insensitive. The keyword and any following colons/hyphens/spaces are consumed,
+# so 'rest' is the TODO text itself. Multi-line so one search finds the first TODO line of a block;
+# none of the parts may cross a newline.
+TODO_PATTERN = r"(?im)^[^\w\n]*(?:todo|to-?do|to[^\S\n]+do)\b(?:[^\S\n]|[:\-])*(?P<rest>.*)"
+# re2's \w and \s only know ASCII, so its pattern names the Unicode letters, digits and spaces instead.
+# Its \b is still ASCII only, so a keyword directly followed by a non-ASCII letter can match with re2.
+TODO_PATTERN_RE2 = r"(?im)^[^\pL\pN_\n]*(?:todo|to-?do|to[\pZ\t]+do)\b(?:[\pZ\t]|[:\-])*(?P<rest>.*)"
+TODO_LINE = re2.compile(TODO_PATTERN_RE2) if re2 else re.compile(TODO_PATTERN)
+
+class BloomFilter:
+    """
+    Compact set of strings that answers either 'definitely not present' or 'possibly present'.
+    Uses about 14 bits per item for a 0.1% false positive rate at the given capacity.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.lock = threading.Lock()
+
+    def _positions(self, item: str):
+        # Double hashing: derive all bit positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str):
+        with self.lock:
+            for pos in self._positions(item):
+                self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+# "source page id without dashes|TODO text" of the auto-generated pages already in the database
+EXISTING_TODOS = BloomFilter(capacity=10_000)
+
+# Block types whose content is rich text that may contain a TODO
+TEXT_BLOCK_TYPES = frozenset({
+    "paragraph", "heading_1", "heading_2", "heading_3", "bulleted_list_item", "numbered_list_item",
+    "to_do", "toggle", "quote", "callout", "code",
+})
+
+# Property values and text that are the same for every To-Do page created. They are shared by
+# every pages.create payload, which is safe because nothing modifies them.
+TODO_TYPE_SELECT = {"select": {"name": "To-Do"}}
+AUTO_GENERATED_TAGS = {"multi_select": [{"name": "Auto Generated"}]}
+SOURCE_LABEL_TEXT = {"type": "text", "text": {"content": "Source: "}}
+
+# Serialises status lines printed by the worker threads so they don't run into each other
+PRINT_LOCK = threading.Lock()
+
+# Pages already scanned in this run; with --since a page can match more than one date
+# (created on one day, 'Finish Before' another) and only needs its blocks fetched once
+SCANNED_PAGE_IDS = set()
+
+def report(message: str):
+    """Prints a status line from a worker thread as a whole line."""
+    with PRINT_LOCK:
+        print(message)
 
 def parse_date_input(date_str: str | None) -> datetime.date:
     """Parses a 'dd.mm.yyyy' string into a date object. Defaults to today's date (UTC) if None."""
@@ -48,74 +225,173 @@ def parse_date_input(date_str: str | None) -> datetime.date:
     except ValueError:
         raise SystemExit(f"Invalid date format: '{date_str}'. Please use dd.mm.yyyy.")
 
-def get_all_database_pages(database_id: str, filter: str):
-    """Generator to yield all pages from a database, handling pagination."""
+def load_state() -> dict:
+    """Reads the state saved by earlier runs, which is empty on the first run or if the file can't be used."""
+    try:
+        with open(STATE_FILE, "rb") as f:
+            state = orjson.loads(f.read())
+    except OSError:
+        return {}
+    except orjson.JSONDecodeError:
+        state = None
+    if not isinstance(state, dict):
+        print(f"Warning: Ignoring {STATE_FILE}, it is not in the expected format.")
+        return {}
+    return state
+
+def save_state(state: dict):
+    """Writes the state for the next run."""
+    try:
+        with open(STATE_FILE, "wb") as f:
+            f.write(orjson.dumps(state, option=orjson.OPT_INDENT_2))
+    except OSError as e:
+        print(f"Warning: Could not save state to {STATE_FILE}. Error: {e}")
+
+@lru_cache(maxsize=8)
+def get_data_source_id(database_id: str) -> str:
+    """Looks up the data source of a database once, all queries go through it."""
+    try:
+        return client.databases.retrieve(database_id=database_id)["data_sources"][0]["id"]
+    except NOTION_ERRORS as e:
+        raise SystemExit(f"Error retrieving database {database_id}: {e}")
+
+@lru_cache(maxsize=8)
+def get_data_source_properties(data_source_id: str) -> dict:
+    """Reads the schema of a data source once, as a dict of property name -> property."""
+    return client.data_sources.retrieve(data_source_id=data_source_id)["properties"]
+
+def get_property_ids(data_source_id: str, property_names: tuple) -> list:
+    """
+    Looks up the ids of the named properties, as needed by the filter_properties query parameter.
+    Notion gives the ids URL-encoded, and httpx encodes query parameters itself, so they are decoded here.
+    """
+    properties = get_data_source_properties(data_source_id)
+    return [unquote(properties[name]["id"]) for name in property_names if name in properties]
+
+def has_source_id_property() -> bool:
+    """Whether the database has the SOURCE_ID_PROP property; databases set up before it was introduced may not."""
+    return SOURCE_ID_PROP in get_data_source_properties(get_data_source_id(NOTION_DATABASE_ID))
+
+def get_all_database_pages(filter: str, properties: tuple = ()):
+    """
+    Generator to yield all pages from the database, handling pagination.
+    If property names are given only those properties are returned for each page.
+    A failed query raises one of NOTION_ERRORS, so the caller knows the results are incomplete.
+    """
+    data_source_id = get_data_source_id(NOTION_DATABASE_ID)
     next_cursor = None
-    db = client.databases.retrieve(database_id=database_id)
-    print(f"Getting data from {db['data_sources'][0]}")
     while True:
-        try:
-            response = client.data_sources.query(data_source_id=db['data_sources'][0]['id'], filter=filter, next_cursor=next_cursor)
-            yield from response.get("results", [])
-            next_cursor = response.get("next_cursor")
-            if not response.get("has_more"):
-                break
-        except APIResponseError as e:
-            print(f"Error querying database: {e}")
+        query_params = {"data_source_id": data_source_id, "filter": filter, "page_size": 100}
+        if properties:
+            query_params["filter_properties"] = get_property_ids(data_source_id, properties)
+        if next_cursor:
+            query_params["start_cursor"] = next_cursor
+        response = client.data_sources.query(**query_params)
+        yield from response.get("results", [])
+        next_cursor = response.get("next_cursor")
+        if not response.get("has_more"):
             break
 
-def get_page_blocks(page_id: str):
-    """Fetches all top-level blocks from a page, handling pagination."""
+def get_page_blocks(page_id: str) -> tuple:
+    """
+    Fetches all top-level blocks from a page, handling pagination.
+    A failed request raises one of NOTION_ERRORS rather than returning part of the page.
+    """
     all_blocks = []
     next_cursor = None
     while True:
-        try:
-            query_params = {"block_id": page_id, "page_size": 100}
-            if next_cursor:
-                query_params["start_cursor"] = next_cursor
-            response = client.blocks.children.list(**query_params)
-            all_blocks.extend(response.get("results", []))
-            next_cursor = response.get("next_cursor")
-            if not response.get("has_more"):
-                break
-        except APIResponseError as e:
-            print(f"Error fetching blocks for page {page_id}: {e}")
+        query_params = {"block_id": page_id, "page_size": 100}
+        if next_cursor:
+            query_params["start_cursor"] = next_cursor
+        response = client.blocks.children.list(**query_params)
+        # Only text blocks are read later; other blocks are kept as small stubs so that
+        # block order (and so which list items follow a TODO) is unchanged
+        all_blocks.extend(block if block.get("type") in TEXT_BLOCK_TYPES else {"id": block["id"], "type": block.get("type")}
+                          for block in response.get("results", []))
+        next_cursor = response.get("next_cursor")
+        if not response.get("has_more"):
+            break
+    return tuple(all_blocks)
+
+def get_relation(page: dict, property_name: str) -> list:
+    """
+    Returns the full relation property of a page as a list of {"id": ...} entries.
+    A query result may not include the property, and holds at most 25 entries of a relation,
+    so in those cases the property is read from the page itself.
+    """
+    prop = page.get("properties", {}).get(property_name)
+    if prop is not None and not prop.get("has_more"):
+        return [{"id": related["id"]} for related in prop.get("relation", [])]
+
+    property_id = prop["id"] if prop else get_data_source_properties(get_data_source_id(NOTION_DATABASE_ID))[property_name]["id"]
+    relation = []
+    next_cursor = None
+    while True:
+        query_params = {"page_id": page["id"], "property_id": property_id}
+        if next_cursor:
+            query_params["start_cursor"] = next_cursor
+        response = client.pages.properties.retrieve(**query_params)
+        relation.extend({"id": item["relation"]["id"]} for item in response.get("results", []))
+        next_cursor = response.get("next_cursor")
+        if not response.get("has_more"):
             break
-    return all_blocks
+    return relation
 
 def extract_text_from_block(block: dict) -> str:
     """Extracts plain text from a Notion block, if available."""
     block_type = block.get("type")
-    if block_type in block and "rich_text" in block[block_type]:
-        return "".join(rt.get("plain_text", "") for rt in block[block_type]["rich_text"])
-    return ""
+    # Images, dividers, child pages etc. have no text and cannot hold a TODO
+    if block_type not in TEXT_BLOCK_TYPES:
+        return ""
+    rich_text = block.get(block_type, {}).get("rich_text")
+    if not rich_text:
+        return ""
+    # Most blocks are a single run of unformatted text, which needs no join
+    if len(rich_text) == 1:
+        return rich_text[0].get("plain_text", "")
+    return "".join(rt.get("plain_text", "") for rt in rich_text)
 
 def get_page_title(page: dict) -> str:
-    """Extracts the plain text title from a page object."""
-    properties = page.get("properties", {})
-    retval = "Untitled"
-    try:
-       retval = properties[TITLE_PROP]["title"][0]["text"]["content"]
-    except:
-        pass # There is apparently no title for this page 
-    return retval
+    """Extracts the plain text title from a page object, remembering it on the page."""
+    if "_cached_title" in page:
+        return page["_cached_title"]
+    title_list = page.get("properties", {}).get(TITLE_PROP, {}).get("title") or []
+    # Pages without a title have an empty list here; a title starting with a mention or
+    # equation has no 'text' part, only plain_text
+    if title_list:
+        first = title_list[0]
+        title = first.get("text", {}).get("content") or first.get("plain_text") or "Untitled"
+    else:
+        title = "Untitled"
+    page["_cached_title"] = title
+    return title
 
-def mark_todo_as_done(block: dict):
-    """Updates a block to replace 'TODO' with 'DONE' and checks the box if applicable."""
+def mark_todo_as_done(block: dict, todo_text: str):
+    """
+    Updates a block to replace 'TODO' with 'DONE' and checks the box if applicable.
+    todo_text only labels the status messages, as the TODOs of a page are handled in parallel.
+    """
     block_id = block["id"]
     block_type = block["type"]
     original_rich_text = block[block_type].get("rich_text", [])
 
-    # Create a new rich_text array with the keyword replaced
+    # Create a new rich_text array with the keyword replaced, sending only the fields the API reads
+    # and leaving the original block untouched
     new_rich_text = []
     for text_obj in original_rich_text:
-        original_content = text_obj.get("text", {}).get("content", "")
-        # Replace only the first occurrence of a TODO pattern with DONE
-        modified_content = TODO_REMOVE.sub("DONE ", original_content, count=1)
-        
-        # Create a new text object; do not modify the original in place
-        new_text_obj = text_obj.copy()
-        new_text_obj["text"]["content"] = modified_content
+        span_type = text_obj.get("type", "text")
+        if span_type == "text":
+            original_text = text_obj["text"]
+            # Replace only the first occurrence of a TODO pattern with DONE
+            new_text = {"content": TODO_LINE.sub(r"DONE \g<rest>", original_text.get("content", ""), count=1)}
+            if original_text.get("link"):
+                new_text["link"] = original_text["link"]
+            new_text_obj = {"type": "text", "text": new_text}
+        else:
+            # Mentions and equations are sent back as they are
+            new_text_obj = {"type": span_type, span_type: text_obj[span_type]}
+        if "annotations" in text_obj:
+            new_text_obj["annotations"] = text_obj["annotations"]
         new_rich_text.append(new_text_obj)
 
     # Construct the payload for the update API call
@@ -131,84 +407,152 @@ def mark_todo_as_done(block: dict):
 
     try:
         client.blocks.update(block_id=block_id, **update_payload)
-        print("    -> Marked original item as DONE.")
+        report(f"    -> '{todo_text}': Marked original item as DONE.")
         return True
-    except APIResponseError as e:
-        print(f"    -> Failed to mark original as DONE. Error: {e}")
+    except NOTION_ERRORS as e:
+        report(f"    -> '{todo_text}': Failed to mark original as DONE. Error: {e}")
         return False
 
-def check_for_duplicate_todo(todo_text: str, source_page_id: str):
+def todo_key(src_no_dashes: str, todo_text: str) -> str:
+    """Builds the EXISTING_TODOS entry for a TODO taken from the given source page (id without dashes)."""
+    return f"{src_no_dashes}|{todo_text}"
+
+def get_source_id(page: dict) -> str:
+    """Extracts the source page id from an auto-generated page's SourceId property, empty if not set."""
+    rich_text = page.get("properties", {}).get(SOURCE_ID_PROP, {}).get("rich_text") or []
+    return "".join(rt.get("plain_text", "") for rt in rich_text)
+
+def find_source_id(blocks) -> str | None:
+    """Returns the source page id (without dashes) from an auto-generated page's 'Link to original page' paragraph."""
+    url = next(filter(None, (
+        (rt.get("text", {}).get("link") or {}).get("url")
+        for block in blocks if block.get("type") == "paragraph"
+        for rt in block["paragraph"]["rich_text"]
+    )), None)
+    return url[-32:] if url else None
+
+@lru_cache(maxsize=512)
+def read_legacy_todo(page_id: str) -> tuple:
     """
-    Checks if an auto-generated TODO for this source page and text already exists.
-    This is a heuristic to prevent creating the same item multiple times.
-    Unused in the current script, but I chose to leave it here for reference.
+    Reads (TODO text, source page id without dashes) from the content of an auto-generated page
+    created before SourceId was recorded; either is None if not found. Only these two strings are
+    cached, as duplicate confirmation looks at the same pages the index was built from.
+    """
+    blocks = get_page_blocks(page_id)
+    todo_text = next((extract_text_from_block(block) for block in blocks if block.get("type") == "paragraph"), None)
+    return todo_text, find_source_id(blocks)
+
+def build_existing_todo_index(since_date):
+    """
+    Fills EXISTING_TODOS from the auto-generated pages created on or after since_date.
+    The source page id comes from the SourceId property. Pages created before that
+    property was recorded are read once instead, taking the TODO text from the first
+    paragraph and the source page id from the 'Link to original page' paragraph.
     """
+    index_filter = {
+        "and": [
+            {"property": TAGS_PROP, "multi_select": {"contains": "Auto Generated"}},
+            {"property": "Created", "created_time": {"on_or_after": since_date.isoformat()}}
+        ]
+    }
+
+    count = 0
+    legacy_pages = []
+    # Without a complete index existing To-Dos would be created again, so stop instead
     try:
-        db = client.databases.retrieve(database_id=NOTION_DATABASE_ID)
-        filter={
-            "and": [
-                {"property": TAGS_PROP, "multi_select": {"contains": "Auto Generated"}},
-                {"property": TITLE_PROP, "title": {"contains": todo_text[:50]}} # Check against a substring
+        if not has_source_id_property():
+            print(f"Warning: The database has no '{SOURCE_ID_PROP}' Text property. To-Dos are still created, but "
+                  "recognising existing ones means reading their content; add the property to avoid this.")
+
+        print(f"Getting data from data source {get_data_source_id(NOTION_DATABASE_ID)}")
+        for page in get_all_database_pages(index_filter, (TITLE_PROP, SOURCE_ID_PROP)):
+            source_id = get_source_id(page)
+            if source_id:
+                EXISTING_TODOS.add(todo_key(source_id.replace("-", ""), get_page_title(page)))
+                count += 1
+            else:
+                legacy_pages.append(page)
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            legacy_todos = list(executor.map(lambda page: read_legacy_todo(page["id"]), legacy_pages))
+    except NOTION_ERRORS as e:
+        raise SystemExit(f"Error reading the existing auto-generated TODOs: {e}")
+
+    for todo_text, source_id in legacy_todos:
+        if todo_text is not None and source_id:
+            EXISTING_TODOS.add(todo_key(source_id, todo_text))
+            count += 1
+
+    print(f"Found {count} existing auto-generated TODOs.")
+
+def confirm_duplicate_todo(todo_text: str, source_page_id: str, src_no_dashes: str) -> bool:
+    """Asks Notion whether an auto-generated page with this title was already created from the source page."""
+    conditions = [
+        {"property": TAGS_PROP, "multi_select": {"contains": "Auto Generated"}},
+        {"property": TITLE_PROP, "title": {"contains": todo_text[:50]}}, # Check against a substring
+    ]
+    # Without the property every candidate is checked through the link in its content
+    if has_source_id_property():
+        conditions.append({
+            "or": [
+                {"property": SOURCE_ID_PROP, "rich_text": {"equals": source_page_id}},
+                # Pages created before SourceId was recorded only link to their source in the content
+                {"property": SOURCE_ID_PROP, "rich_text": {"is_empty": True}}
             ]
-        }
-        response = client.data_sources.query(data_source_id=db['data_sources'][0]['id'], filter=filter)
-
-        # Further check if any result links back to the same source page
-        for page in response.get("results", []):
-            page_content = get_page_blocks(page["id"])
-            for block in page_content:
-                if "paragraph" in block:
-                    for rt in block["paragraph"]["rich_text"]:
-                        if rt.get("text", {}).get("link", {}).get("url", "").endswith(source_page_id.replace("-", "")):
-                            return True
+        })
+    duplicate_filter = {"and": conditions}
+    for page in get_all_database_pages(duplicate_filter, (TITLE_PROP, SOURCE_ID_PROP)):
+        if get_page_title(page) != todo_text:
+            continue
+        if get_source_id(page) == source_page_id or read_legacy_todo(page["id"])[1] == src_no_dashes:
+            return True
+    return False
+
+def check_for_duplicate_todo(todo_text: str, source_page_id: str, src_no_dashes: str) -> bool:
+    """
+    Checks if an auto-generated TODO for this source page and text already exists.
+    Most TODOs are new, which the Bloom filter answers without any API call; only
+    a possible match is confirmed with a database query.
+    """
+    if todo_key(src_no_dashes, todo_text) not in EXISTING_TODOS:
         return False
-    except APIResponseError as e:
-        print(f"Warning: Could not check for duplicates due to API error: {e}")
-        return False # Fail open to allow creation
+    return confirm_duplicate_todo(todo_text, source_page_id, src_no_dashes)
 
-def create_todo_page(source_page: dict, todo_text: str, following_list_blocks: list = None) -> bool:
+def create_todo_page(source_page: dict, clean_text: str, following_list_blocks: list = None) -> str | None:
     """Creates a new page in the database for a found TODO item.
-    	returns True on success, False on failure.
+    	returns the id of the new page, or None on failure.
 	"""
     if following_list_blocks is None:
         following_list_blocks = []
 
     source_page_id = source_page["id"]
     source_page_title = get_page_title(source_page)
-    source_page_url = source_page.get("url", f"https://www.notion.so/{source_page_id.replace('-', '')}")
-
-    # Remove the TODO keyword from the text for the page content
-    # First strip leading/trailing whitespace, then remove TODO pattern
-    clean_text = todo_text.strip()
-    # Remove TODO and everything before it (like leading punctuation), keep everything after
-    clean_text = TODO_REMOVE.sub("", clean_text).strip()
-    # Remove any remaining leading punctuation (colon, hyphen, etc.) and whitespace
-    clean_text = re.sub(r"^[:\-\s]+", "", clean_text).strip()
+    # Page ids appear without dashes in URLs and in the duplicate index
+    src_no_dashes = source_page_id.replace("-", "")
+    source_page_url = source_page.get("url") or f"https://www.notion.so/{src_no_dashes}"
 
     new_page_title = f"{clean_text}"
 
-    print(f"  - Found TODO: '{clean_text}'")
-
-    # Duplicate check is currently disabled to avoid false negatives.
-    #if check_for_duplicate_todo(todo_text, source_page_id):
-    #    print("    -> Skipping, duplicate already exists.")
-    #    return
-
-    # Get the parent item from the source page (if it exists)
-    source_properties = source_page.get("properties", {})
-    parent_relation = source_properties.get(PARENT_ITEM_PROP, {}).get("relation", [])
+    # The new page inherits the source page's parent item if it has one, otherwise the source
+    # page itself is the parent, so the relation is never sent empty
+    try:
+        parent_relation = get_relation(source_page, PARENT_ITEM_PROP)
+    except NOTION_ERRORS as e:
+        report(f"    -> '{clean_text}': Could not read the source page's parent item. Error: {e}")
+        return None
+    if not parent_relation:
+        parent_relation = [{"id": source_page_id}]
 
     # Build properties for the new page
     new_page_properties = {
         TITLE_PROP: {"title": [{"text": {"content": new_page_title}}]},
-        TYPE_PROP: {"select": {"name": "To-Do"}},
-        TAGS_PROP: {"multi_select": [{"name": "Auto Generated"}]},
-        PARENT_ITEM_PROP: {"relation": [{"id": source_page_id}]}  # Set source page as parent
+        TYPE_PROP: TODO_TYPE_SELECT,
+        TAGS_PROP: AUTO_GENERATED_TAGS,
+        PARENT_ITEM_PROP: {"relation": parent_relation},
     }
-
-    # If source page has a parent, inherit it
-    if parent_relation:
-        new_page_properties[PARENT_ITEM_PROP] = {"relation": parent_relation}
+    # Notion rejects the whole page if it names a property the database doesn't have
+    if has_source_id_property():
+        new_page_properties[SOURCE_ID_PROP] = {"rich_text": [{"text": {"content": source_page_id}}]}
 
     # Build the children blocks for the new page
     children_blocks = [
@@ -241,14 +585,14 @@ def create_todo_page(source_page: dict, todo_text: str, following_list_blocks: l
         "type": "paragraph",
         "paragraph": {
             "rich_text": [
-                {"type": "text", "text": {"content": "Source: "}},
+                SOURCE_LABEL_TEXT,
                 {"type": "text", "text": {"content": "Link to original page", "link": {"url": source_page_url}}},
             ]
         },
     })
 
     if following_list_blocks:
-        print(f"    -> Including {len(following_list_blocks)} list item(s)")
+        report(f"    -> '{clean_text}': Including {len(following_list_blocks)} list item(s)")
 
     try:
         new_page = client.pages.create(
@@ -256,33 +600,109 @@ def create_todo_page(source_page: dict, todo_text: str, following_list_blocks: l
             properties=new_page_properties,
             children=children_blocks,
         )
-        print("    -> Created new To-Do page.")
+        report(f"    -> '{clean_text}': Created new To-Do page.")
+        EXISTING_TODOS.add(todo_key(src_no_dashes, clean_text))
+        return new_page["id"]
+    except NOTION_ERRORS as e:
+        report(f"    -> '{clean_text}': Failed to create page. Error: {e}")
+        return None
+
+def process_page(page: dict, blocks: tuple) -> bool:
+    """
+    Finds the TODOs on a page, creates a To-Do page for each one and marks the originals as DONE.
+    Returns False if any of this failed, so the page needs scanning again.
+    """
+    page_title = get_page_title(page)
+    print(f"Scanning page: '{page_title}'")
+
+    # clean_line -> (blocks, following_list_blocks) for each distinct TODO found on the page
+    todos = {}
+
+    # List block types that should be collected as sub-items
+    list_block_types = {"bulleted_list_item", "numbered_list_item"}
+
+    for i, block in enumerate(blocks):
+        text_content = extract_text_from_block(block)
+        # Every spelling of the keyword ends in "do", and a substring test is much cheaper than
+        # the regex for the many blocks that don't contain it
+        if "do" not in text_content.lower():
+            continue
+        # Only the first TODO line of each block is processed
+        match = TODO_LINE.search(text_content)
+        if not match:
+            continue
+        # The match has already dropped the keyword and any checkbox syntax, just remove extra whitespace
+        clean_line = match.group("rest").strip()
+
+        # The same TODO repeated on the page is only created once, but every copy is marked DONE
+        if clean_line in todos:
+            todos[clean_line][0].append(block)
+            continue
+
+        # Collect following list items
+        following_list_blocks = []
+        j = i + 1
+        while j < len(blocks) and blocks[j].get("type") in list_block_types:
+            following_list_blocks.append(blocks[j])
+            j += 1
+
+        todos[clean_line] = ([block], following_list_blocks)
+
+    if not todos:
+        print("  - No TODOs found on this page.")
+        return True
+
+    src_no_dashes = page["id"].replace("-", "")
+
+    def create_and_mark(clean_line):
+        """
+        Creates the To-Do page and marks the original block(s) as DONE as soon as it exists.
+        Returns whether all of it succeeded, and the id of the new page if one was created.
+        """
+        source_blocks, list_blocks = todos[clean_line]
+        report(f"  - Found TODO: '{clean_line}'")
 
-        # Update the source page to add this new page to its Sub-item relation
-        new_page_id = new_page["id"]
         try:
-            # Get current sub-items from source page
-            current_sub_items = source_properties.get(SUB_ITEM_PROP, {}).get("relation", [])
-            # Add the new page to the sub-items list
-            updated_sub_items = current_sub_items + [{"id": new_page_id}]
-
-            client.pages.update(
-                page_id=source_page_id,
-                properties={
-                    SUB_ITEM_PROP: {"relation": updated_sub_items}
-                }
-            )
-            print("    -> Added to source page as sub-item.")
-        except APIResponseError as e:
-            print(f"    -> Warning: Could not update source page sub-items. Error: {e}")
-
-        return True # Return True on success
-    except APIResponseError as e:
-        print(f"    -> Failed to create page. Error: {e}")
-        return False # Return False on failure
-
-def process_date(target_date):
-    """Process TODOs for a specific date."""
+            is_duplicate = check_for_duplicate_todo(clean_line, page["id"], src_no_dashes)
+        except NOTION_ERRORS as e:
+            report(f"    -> '{clean_line}': Could not check for an existing To-Do. Error: {e}")
+            return False, None
+
+        new_page_id = None
+        # A previous run already created this item, so only the original still needs marking as DONE
+        if is_duplicate:
+            report(f"    -> '{clean_line}': Skipping, duplicate already exists.")
+        else:
+            new_page_id = create_todo_page(page, clean_line, list_blocks)
+            if new_page_id is None:
+                return False, None
+
+        marked = [mark_todo_as_done(block, clean_line) for block in source_blocks]
+        return all(marked), new_page_id
+
+    # Each TODO is handled independently, so the page's TODOs are sent in parallel and one
+    # TODO's blocks are updated without waiting for the other pages to be created
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = list(executor.map(create_and_mark, todos))
+    succeeded = all(todo_succeeded for todo_succeeded, _ in results)
+    new_page_ids = [new_page_id for _, new_page_id in results if new_page_id]
+
+    # Add all the new pages to the source page's Sub-item relation with a single update
+    if new_page_ids:
+        try:
+            # The update replaces the whole relation, so it starts from the complete current one
+            updated_sub_items = get_relation(page, SUB_ITEM_PROP)
+            updated_sub_items.extend({"id": new_page_id} for new_page_id in new_page_ids)
+            client.pages.update(page_id=page["id"], properties={SUB_ITEM_PROP: {"relation": updated_sub_items}})
+            print(f"  - Added {len(new_page_ids)} new To-Do page(s) to the source page as sub-items.")
+        except NOTION_ERRORS as e:
+            print(f"  - Warning: Could not update source page sub-items. Error: {e}")
+            succeeded = False
+
+    return succeeded
+
+def process_date(target_date) -> bool:
+    """Process TODOs for a specific date. Returns False if any of the date's work failed."""
     print(f"Scanning Notion database for pages created on: {target_date.strftime('%d.%m.%Y')}")
 
     target_iso_date = target_date.isoformat()
@@ -298,48 +718,49 @@ def process_date(target_date):
                 ]
             },
             # Exclude pages tagged as "Auto Generated"
-            {"property": TAGS_PROP, "multi_select": {"does_not_contain": "Auto Generated"}}
+            {"property": TAGS_PROP, "multi_select": {"does_not_contain": "Auto Generated"}},
+            # Exclude To-Do pages, their content is the TODO itself
+            {"property": TYPE_PROP, "select": {"does_not_equal": "To-Do"}}
         ]
     }
 
-    for page in get_all_database_pages(NOTION_DATABASE_ID, date_filter):
-        page_title = get_page_title(page)
-        print(f"Scanning page: '{page_title}'")
-
-        blocks = get_page_blocks(page["id"])
-        found_todos = False
-
-        # List block types that should be collected as sub-items
-        list_block_types = {"bulleted_list_item", "numbered_list_item"}
-
-        i = 0
-        while i < len(blocks):
-            block = blocks[i]
-            text_content = extract_text_from_block(block)
-            for line in text_content.splitlines():
-                if TODO_DETECT.search(line):
-                    found_todos = True
-                    # Clean up the line by removing checkbox syntax and extra whitespace
-                    clean_line = re.sub(r"^\s*\[\s*[xX]?\s*\]\s*", "", line).strip()
-
-                    # Collect following list items
-                    following_list_blocks = []
-                    j = i + 1
-                    while j < len(blocks) and blocks[j].get("type") in list_block_types:
-                        following_list_blocks.append(blocks[j])
-                        j += 1
-
-                    # Step 1: Try to create the new To-Do page with list items
-                    is_successful = create_todo_page(page, clean_line, following_list_blocks)
-
-                    # Step 2: If successful, update the original block
-                    if is_successful:
-                        mark_todo_as_done(block)
-                    break  # Only process the first TODO line per block
-            i += 1
-
-        if not found_todos:
-            print("  - No TODOs found on this page.")
+    # Only request the properties that are read when creating the To-Do pages
+    page_properties = (TITLE_PROP, SUB_ITEM_PROP, PARENT_ITEM_PROP)
+
+    # Every page has to be fetched: Notion's search endpoint only matches page titles,
+    # so it cannot be used to find the pages with TODOs in their content.
+    # Pages are streamed from the query and their blocks fetched in the background as they
+    # arrive, so scanning starts while later pages of results are still being paginated.
+    def process_next_page() -> bool:
+        ready_page, blocks_future = pending.popleft()
+        try:
+            blocks = blocks_future.result()
+        except NOTION_ERRORS as e:
+            print(f"Error fetching blocks for page '{get_page_title(ready_page)}': {e}")
+            return False
+        return process_page(ready_page, blocks)
+
+    succeeded = True
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        pending = deque()
+        try:
+            print(f"Getting data from data source {get_data_source_id(NOTION_DATABASE_ID)}")
+            for page in get_all_database_pages(date_filter, page_properties):
+                if page["id"] in SCANNED_PAGE_IDS:
+                    continue
+                SCANNED_PAGE_IDS.add(page["id"])
+                pending.append((page, executor.submit(get_page_blocks, page["id"])))
+                if len(pending) > MAX_WORKERS:
+                    succeeded = process_next_page() and succeeded
+        except NOTION_ERRORS as e:
+            print(f"Error querying database: {e}")
+            succeeded = False
+
+        # The pages already found are still processed after a failed query
+        while pending:
+            succeeded = process_next_page() and succeeded
+
+    return succeeded
 
 def main():
     parser = argparse.ArgumentParser(
@@ -370,20 +791,45 @@ def main():
         if start_date > end_date:
             raise SystemExit(f"Error: Start date {start_date.strftime('%d.%m.%Y')} is in the future.")
 
+        # Dates finished by an earlier --since run are not scanned again
+        state = load_state()
+        last_processed = state.get(NOTION_DATABASE_ID)
+        resume_date = None
+        if last_processed:
+            try:
+                resume_date = datetime.strptime(last_processed, "%Y-%m-%d").date() + timedelta(days=1)
+            except (TypeError, ValueError):
+                print(f"Warning: Ignoring the last processed date {last_processed!r} in {STATE_FILE}, it is not a yyyy-mm-dd date.")
+        if resume_date and resume_date > start_date:
+            print(f"Dates up to {resume_date - timedelta(days=1):%d.%m.%Y} were processed by an earlier run.")
+            start_date = resume_date
+
+        build_existing_todo_index(start_date)
+
         current_date = start_date
+        all_succeeded = True
         print(f"Processing dates from {start_date.strftime('%d.%m.%Y')} to {end_date.strftime('%d.%m.%Y')}")
         print("=" * 80)
 
         while current_date <= end_date:
-            process_date(current_date)
+            all_succeeded = process_date(current_date) and all_succeeded
             print("-" * 80)
+            # Only dates up to the first failure are recorded, so the next run retries from there.
+            # Today is never recorded, TODOs can still be added to today's pages
+            if all_succeeded and current_date < end_date:
+                state[NOTION_DATABASE_ID] = current_date.isoformat()
+                save_state(state)
             current_date += timedelta(days=1)
 
         print(f"\nCompleted processing {(end_date - start_date).days + 1} days.")
+        if not all_succeeded:
+            print("Some TODOs could not be processed, see the errors above. The next --since run starts again from the first date with errors.")
     else:
         # Process single date (original behavior)
         target_date = parse_date_input(args.date)
-        process_date(target_date)
+        build_existing_todo_index(target_date)
+        if not process_date(target_date):
+            print("Some TODOs could not be processed, see the errors above.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file